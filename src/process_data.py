@@ -1,22 +1,51 @@
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Optional
+
 import pandas as pd
-import re
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from utils.text_cleaning import (
     anonymize_name,
     email_to_domain,
-    mask_emails_in_message,
-    mask_urls_in_message,
-    mask_phones_in_message,
-    email_count,
-    phone_count,
-    url_count,
+    mask_and_count,
     anonymize_origin_url,
 )
 
 INPUT_PATH = "../data/raw/data.csv"
-OUTPUT_PATH_INTERIM = "../data/interim/data_clean.csv"
+OUTPUT_PATH_INTERIM = "../data/interim/data_clean.parquet"
 OUTPUT_PATH_FINAL = "../data/processed/data_clean.csv"
 
+# Tipos de todas las columnas leídas: así el esquema del Parquet, que se fija
+# con el primer bloque, no depende de si una columna viene vacía en ese bloque
+COLUMN_DTYPES = {
+    "Nombre": "string",
+    "Email": "string",
+    "Mensaje": "string",
+    "ID Entrada": "Int64",
+    "Fecha entrada": "string",
+    "URL de origen": "string",
+    "Agente de usuario": "string",
+    "IP del usuario": "string",
+    "Submission Speed (ms)": "string",
+}
+
+# Filas por bloque: la memoria queda acotada aunque el CSV sea grande
+CHUNK_SIZE = 50_000
+# Procesos del pool; con uno solo no compensa y se procesa en el actual
+MAX_WORKERS = os.cpu_count() or 1
+# Mensajes que se envían juntos a cada proceso del pool
+WORKER_CHUNK_SIZE = 1_000
+
+MESSAGE_COLS = [
+    "email_count_msg",
+    "phone_count_msg",
+    "url_count_msg",
+    "message_clean",
+]
+
 COLUMN_RENAME_MAP = {
     "Nombre": "name",
     "Email": "email",
@@ -44,56 +73,123 @@ OUTPUT_COLS = [
     "url_count_msg",
 ]
 
-df = pd.read_csv(INPUT_PATH)
-# print("(Filas, Columnas): ", df.shape)
-# print("Filas:", len(df))
-# print("Columnas:", list(df.columns))
-# print(df.head(3))
-
-df = df.rename(columns=COLUMN_RENAME_MAP)
-df["name_anon"] = df["name"].apply(anonymize_name)
-df["email_domain"] = df["email"].apply(email_to_domain)
-df["email_count_msg"] = df["message"].apply(email_count)
-df["phone_count_msg"] = df["message"].apply(phone_count)
-df["url_count_msg"] = df["message"].apply(url_count)
-df["message_clean"] = (
-    df["message"]
-    .apply(mask_emails_in_message)
-    .apply(mask_urls_in_message)
-    .apply(mask_phones_in_message)
-    .apply(
-        lambda x: re.sub(r"\s+", " ", x).strip()
-    )  # Eliminar espacios extra entre el mensaje
-)
 
-# Columnas después de procesamiento:
-# print("Columnas:", list(df.columns))
-
-df["origin_url_anon"] = df["origin_url"].apply(anonymize_origin_url)
-
-# Verificar resultado del procesamiento
-# print(
-#     df[
-#         [
-#             "name",
-#             "name_anon",
-#             "email",
-#             "email_domain",
-#             "message",
-#             "message_clean",
-#             "email_count_msg",
-#             "phone_count_msg",
-#             "origin_url",
-#             "origin_url_anon",
-#         ]
-#     ].head(5)
-# )
-
-df[OUTPUT_COLS].to_csv(OUTPUT_PATH_INTERIM, index=False)
-print("Saved:", OUTPUT_PATH_INTERIM)
-
-df_processed = df[OUTPUT_COLS].copy()
-df_processed["label"] = ""  # después serán: spam/not_spam/doubt/ads
-
-df_processed.to_csv(OUTPUT_PATH_FINAL, index=False)
-print("Saved:", OUTPUT_PATH_FINAL)
+def _map_unique(values: pd.Series, func) -> pd.Series:
+    # Los valores se repiten mucho (mismas páginas de origen, dominios y
+    # nombres): func se llama una vez por valor distinto, no por fila
+    return values.map({value: func(value) for value in values.unique()})
+
+
+def _process_message(message: str) -> tuple:
+    # A nivel de módulo para que el pool de procesos pueda serializarla
+    clean, n_emails, n_urls, n_phones = mask_and_count(message)
+    return n_emails, n_phones, n_urls, clean
+
+
+def clean_chunk(df: pd.DataFrame, executor: Optional[Executor] = None) -> pd.DataFrame:
+    """
+    Limpia y anonimiza un bloque del CSV exportado de Gravity Forms.
+    Args:
+        df (pd.DataFrame): Bloque con las columnas originales del CSV.
+        executor (Optional[Executor]): Pool donde repartir el procesado de los
+            mensajes. Si es None, se procesan en el proceso actual.
+    Returns:
+        pd.DataFrame: El bloque procesado con las columnas de OUTPUT_COLS.
+    """
+    # print("(Filas, Columnas): ", df.shape)
+    # print("Columnas:", list(df.columns))
+    # print(df.head(3))
+
+    df = df.rename(columns=COLUMN_RENAME_MAP)
+    df["name_anon"] = _map_unique(df.pop("name").fillna(""), anonymize_name)
+    df["email_domain"] = _map_unique(df.pop("email").fillna(""), email_to_domain)
+    # Cada mensaje es independiente: se reparten entre procesos (el GIL
+    # impide paralelizar con hilos el trabajo de regex en Python).
+    # No se usa Series.str: con textos, cada .str.replace/.str.count es
+    # igualmente un bucle Python por elemento, harían falta cuatro pasadas
+    # (máscara y tres conteos) en vez de una, y .str.replace no permite que
+    # un teléfono devuelva su último bloque a un email (ver _iter_matches).
+    messages = df.pop("message").fillna("").astype(str)
+    if executor is None:
+        results = map(_process_message, messages)
+    else:
+        results = executor.map(
+            _process_message, messages, chunksize=WORKER_CHUNK_SIZE
+        )
+    df[MESSAGE_COLS] = pd.DataFrame(
+        list(results), columns=MESSAGE_COLS, index=df.index
+    )
+
+    # Columnas después de procesamiento:
+    # print("Columnas:", list(df.columns))
+
+    origin_urls = df.pop("origin_url").fillna("")
+    df["origin_url_anon"] = _map_unique(origin_urls, anonymize_origin_url)
+
+    # Verificar resultado del procesamiento
+    # (las columnas originales ya se han descartado para liberar memoria)
+    # print(
+    #     df[
+    #         [
+    #             "name_anon",
+    #             "email_domain",
+    #             "message_clean",
+    #             "email_count_msg",
+    #             "phone_count_msg",
+    #             "origin_url_anon",
+    #         ]
+    #     ].head(5)
+    # )
+
+    return df[OUTPUT_COLS]
+
+
+def _write_chunk(df: pd.DataFrame, writer: pq.ParquetWriter, first: bool) -> None:
+    writer.write_table(
+        pa.Table.from_pandas(df, schema=writer.schema, preserve_index=False)
+    )
+
+    # label después será: spam/not_spam/doubt/ads
+    df_processed = df.assign(label="")
+
+    # Se queda en CSV porque la columna label se rellena a mano
+    df_processed.to_csv(
+        OUTPUT_PATH_FINAL,
+        mode="w" if first else "a",
+        header=first,
+        index=False,
+    )
+
+
+def main() -> None:
+    # Solo leemos las columnas que usamos, y por bloques
+    chunks = pd.read_csv(
+        INPUT_PATH,
+        usecols=list(COLUMN_RENAME_MAP),
+        dtype=COLUMN_DTYPES,
+        chunksize=CHUNK_SIZE,
+    )
+    writer = None
+    try:
+        pool = ProcessPoolExecutor(MAX_WORKERS) if MAX_WORKERS > 1 else nullcontext()
+        with pool as executor:
+            for i, chunk in enumerate(chunks):
+                df = clean_chunk(chunk, executor)
+                if writer is None:
+                    # Parquet (requiere pyarrow): más rápido de leer y escribir
+                    # y ocupa menos que CSV. El esquema lo fija el primer bloque.
+                    schema = pa.Schema.from_pandas(df, preserve_index=False)
+                    writer = pq.ParquetWriter(
+                        OUTPUT_PATH_INTERIM, schema, compression="zstd"
+                    )
+                _write_chunk(df, writer, first=i == 0)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    print("Saved:", OUTPUT_PATH_INTERIM)
+    print("Saved:", OUTPUT_PATH_FINAL)
+
+
+if __name__ == "__main__":
+    main()
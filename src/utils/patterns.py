@@ -0,0 +1,66 @@
+# Expresiones regulares compartidas por los scripts de limpieza: se compilan
+# una sola vez, al importar el módulo.
+
+import re
+
+PHONE_PAT = r"""
+    (?<!\d)               # evita pegarse a otro número
+    (?:\+?\d{1,3}[\s-]?)? # prefijo opcional (+34, +1, etc.)
+    \d(?:[\s-]?\d){7,11}  # cuerpo del número (separadores solo entre dígitos)
+    (?!-?\d)              # evita pegarse a otro número; un espacio sí separa
+                          # dos teléfonos seguidos ("600123456 911223344")
+"""
+
+# Ramas de la alternancia de URLs (se perfilan con tools/profile_regex.py).
+# No hace falta un lookbehind (?<!@): en COMBINED_MASK_REGEX los emails se
+# consumen antes, así que nombre@gmail.com nunca llega a la rama de URLs.
+# Los dominios "sueltos" solo cuentan con un TLD conocido (y un ccTLD
+# opcional, p. ej. .co.uk o .com.es): la rama genérica palabra.palabra
+# encajaba con "260.000km", "p.ej." o "3.0.1". Con ruta detrás (bit.ly/abc,
+# t.me/grupo) basta con que el TLD sea de letras, sea cual sea.
+# Sin "de", "me" ni "it": sueltos chocan con "Hola.Me interesa"; con ruta
+# detrás (shop.de/oferta) los recoge la última rama.
+URL_TLDS = tuple(
+    "com es net org io co info biz gov edu eu fr pt uk ru cn ly xyz online site".split()
+)
+URL_BRANCHES = (
+    r"https?://\S+",
+    r"www\.\S+",
+    (
+        r"[a-z0-9-]+(?:\.[a-z0-9-]+)*"
+        r"\.(?:" + "|".join(URL_TLDS) + r")(?:\.[a-z]{2})?\b(?:/\S*)?"
+    ),
+    r"[a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,}/\S*",
+)
+URL_PAT = r"\b(?:" + "|".join(URL_BRANCHES) + ")"
+
+EMAIL_PAT = r"\b[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}\b"
+
+# Los patrones de URL y teléfono no se compilan por separado: fuera de
+# COMBINED_MASK_REGEX no son correctos (sin los emails por delante, la rama
+# de URLs encaja con el dominio de rocio@gmail.com, y la de teléfonos con
+# el usuario de 600123456@gmail.com). Para enmascarar o contar, usar
+# text_cleaning.mask_message / count_all.
+EMAIL_REGEX = re.compile(EMAIL_PAT, re.IGNORECASE)
+
+# Prefiltros: toda coincidencia de cada grupo contiene alguna de estas
+# subcadenas, y buscarlas es mucho más barato que la alternancia completa.
+MASK_HINT_PATS = {
+    "email": "@",
+    "url": r"://|www\.|\.(?:" + "|".join(URL_TLDS) + r")|\.[a-z]{2,}/",
+    "phone": r"\d",
+}
+MASK_HINT_REGEXES = {
+    group: re.compile(pat, re.IGNORECASE) for group, pat in MASK_HINT_PATS.items()
+}
+ANY_MASK_HINT_REGEX = re.compile("|".join(MASK_HINT_PATS.values()), re.IGNORECASE)
+
+# Una sola pasada para enmascarar emails, URLs y teléfonos. El orden de la
+# alternancia reproduce el del pipeline (emails -> URLs -> teléfonos). Un
+# teléfono pegado al usuario de un email ("600 123 456 123juan@gmail.com") se
+# corrige en text_cleaning, no aquí: un lookahead hasta la @ se repetía en
+# cada paso de backtracking y disparaba el coste con tramos como "1-1-1-...".
+COMBINED_MASK_REGEX = re.compile(
+    f"(?P<email>{EMAIL_PAT})|(?P<url>{URL_PAT})|(?P<phone>{PHONE_PAT})",
+    re.VERBOSE | re.IGNORECASE,
+)
@@ -1,42 +1,140 @@
 import hashlib
 import re
+from functools import lru_cache
 from urllib.parse import urlparse, urlunparse
 
-PHONE_REGEX = re.compile(
-    r"""
-    (?<!\d)               # evita pegarse a otro número
-    (?:\+?\d{1,3}[\s-]?)? # prefijo opcional (+34, +1, etc.)
-    \d(?:[\s-]?\d){7,11}  # cuerpo del número (separadores solo entre dígitos)
-    (?!\d)                # evita pegarse a otro número
-    """,
-    re.VERBOSE,
+from utils.patterns import (
+    ANY_MASK_HINT_REGEX,
+    COMBINED_MASK_REGEX,
+    MASK_HINT_REGEXES,
 )
 
-URL_REGEX = re.compile(
-    r"""
-    (?i)\b(
-        (?:https?://|www\.)\S+
-        |
-        (?<!@)                       # evita nombre@gmail.com
-        [a-z0-9-]+(?:\.[a-z0-9-]+)+
-        (?:/[^\s]*)?
-    )
-    """,
-    re.VERBOSE,
-)
+MASK_TOKENS = {"email": "[EMAIL]", "url": "[URL]", "phone": "[PHONE]"}
+
+# Valores que se tratan como vacíos (p. ej. NaN convertido a texto)
+EMPTY_TOKENS = frozenset(("nan", "none"))
+EMPTY_TOKEN_MAX_LEN = max(map(len, EMPTY_TOKENS))
+
+# Usuario de un email que empieza justo detrás de un teléfono (64 caracteres
+# es el máximo de un usuario), y último bloque del teléfono, que se le devuelve
+EMAIL_LOCAL_TAIL_REGEX = re.compile(r"[a-z0-9._%+-]{0,64}@", re.IGNORECASE)
+PHONE_LAST_BLOCK_REGEX = re.compile(r"[\s-]?\d+$")
 
-EMAIL_REGEX = re.compile(r"""(?i)\b[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}\b""")
+# Caracteres que pueden quedar pegados al dominio de un email
+DOMAIN_STRIP_CHARS = " >),;\"'"
 
 
 def normalize_text(value) -> str:
     if value is None:
         return ""
-    text = str(value).strip()
-    if not text or text.lower() in {"nan", "none"}:
+    text = value.strip() if isinstance(value, str) else str(value).strip()
+    # Solo se pasa a minúsculas si el texto es tan corto como "nan"/"none":
+    # evita copiar mensajes largos enteros en cada llamada
+    if not text or (len(text) <= EMPTY_TOKEN_MAX_LEN and text.lower() in EMPTY_TOKENS):
         return ""
     return text
 
 
+def _iter_matches(text: str):
+    # Recorre las coincidencias de COMBINED_MASK_REGEX como (inicio, fin,
+    # grupo). Si un teléfono acaba pegado al usuario de un email
+    # ("600 123 456 123juan@gmail.com"), le devuelve su último bloque y la
+    # búsqueda sigue desde ahí, para que el email se detecte entero.
+    pos = 0
+    while True:
+        match = COMBINED_MASK_REGEX.search(text, pos)
+        if match is None:
+            return
+        start, pos, group = match.start(), match.end(), match.lastgroup
+        if group == "phone" and EMAIL_LOCAL_TAIL_REGEX.match(text, pos):
+            cut = PHONE_LAST_BLOCK_REGEX.search(match.group()).start()
+            if cut:
+                pos = start + cut
+                if COMBINED_MASK_REGEX.fullmatch(text, start, pos) is None:
+                    continue  # sin ese bloque ya no es un teléfono
+        yield start, pos, group
+
+
+def _mask_spans(text: str, spans) -> str:
+    # Sustituye cada tramo (inicio, fin, grupo) por su token
+    pieces, pos = [], 0
+    for start, end, group in spans:
+        pieces += (text[pos:start], MASK_TOKENS[group])
+        pos = end
+    pieces.append(text[pos:])
+    return "".join(pieces)
+
+
+def _may_contain(text: str, group: str) -> bool:
+    return MASK_HINT_REGEXES[group].search(text) is not None
+
+
+def _mask_group(message: str, group: str) -> str:
+    # Enmascara solo el grupo pedido; el resto de coincidencias se dejan
+    # intactas (así un email nunca se confunde con una URL, por ejemplo).
+    text = normalize_text(message)
+    if not _may_contain(text, group):
+        return text
+    return _mask_spans(text, [s for s in _iter_matches(text) if s[2] == group])
+
+
+def _count_group(message: str, group: str) -> int:
+    text = normalize_text(message)
+    if not text or not _may_contain(text, group):
+        return 0
+    return sum(1 for *_, g in _iter_matches(text) if g == group)
+
+
+def mask_and_count(message: str) -> tuple:
+    """
+    Enmascara y cuenta emails, URLs y teléfonos recorriendo el texto una
+    sola vez: se cuentan las mismas coincidencias que se sustituyen.
+    Args:
+        message (str): El texto a procesar.
+    Returns:
+        tuple: (texto limpio, número de emails, número de URLs,
+            número de teléfonos).
+    """
+    counts = dict.fromkeys(MASK_TOKENS, 0)
+    text = normalize_text(message)
+    if ANY_MASK_HINT_REGEX.search(text):
+        spans = list(_iter_matches(text))
+        for *_, group in spans:
+            counts[group] += 1
+        text = _mask_spans(text, spans)
+    return " ".join(text.split()), counts["email"], counts["url"], counts["phone"]
+
+
+def count_all(message: str) -> tuple:
+    """
+    Cuenta emails, URLs y teléfonos del texto en una sola pasada.
+    Args:
+        message (str): El texto a procesar.
+    Returns:
+        tuple: (número de emails, número de URLs, número de teléfonos).
+    """
+    return mask_and_count(message)[1:]
+
+
+def mask_message(message: str) -> str:
+    """
+    Enmascara emails, URLs y teléfonos en una sola pasada y elimina los
+    espacios extra del mensaje.
+    Args:
+        message (str): El texto a procesar.
+    Returns:
+        str: El texto limpio con [EMAIL], [URL] y [PHONE].
+    """
+    return mask_and_count(message)[0]
+
+
+@lru_cache(maxsize=65536)
+def _hash_name(salt: str, normalized: str) -> str:
+    # Muchos envíos repiten nombre (bots incluidos): cacheamos el hash.
+    raw = f"{salt}:{normalized}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:8]  # corto para que sea manejable
+
+
 def anonymize_name(name: str, salt: str = "gf_v1") -> str:
     """
     Pseudonimiza un nombre de forma estable:
@@ -53,9 +151,7 @@ def anonymize_name(name: str, salt: str = "gf_v1") -> str:
     if not name:
         return ""
     normalized = " ".join(name.lower().split())  # quita dobles espacios y normaliza
-    raw = f"{salt}:{normalized}".encode("utf-8")
-    digest = hashlib.sha256(raw).hexdigest()[:8]  # corto para que sea manejable
-    return f"NAME_{digest}"
+    return f"NAME_{_hash_name(salt, normalized)}"
 
 
 def email_to_domain(email: str) -> str:
@@ -68,12 +164,13 @@ def email_to_domain(email: str) -> str:
         str: El dominio del email o '' si no es válido.
     """
     email = normalize_text(email)
-    if "@" not in email:
+    # rpartition no construye una lista como split
+    _, sep, domain = email.rpartition("@")
+    if not sep:
         return ""
 
-    domain = email.split("@")[-1].strip()
-    # Limpiar caracteres que podrían estar pegados al dominio
-    domain = domain.strip(" >),;\"'")
+    # Limpiar espacios y caracteres que podrían estar pegados al dominio
+    domain = domain.strip().strip(DOMAIN_STRIP_CHARS)
 
     # Validación mínima: que tenga un punto y no tenga espacios
     if " " in domain or "." not in domain:
@@ -90,23 +187,18 @@ def mask_phones_in_message(message: str) -> str:
     Returns:
         str: El texto con los números de teléfono enmascarados.
     """
-    text = normalize_text(message)
-    return PHONE_REGEX.sub("[PHONE]", text)
+    return _mask_group(message, "phone")
 
 
 def phone_count(message: str) -> int:
     """
-    Cuenta cuántos teléfonos detecta en el texto usando PHONE_REGEX.
+    Cuenta cuántos teléfonos detecta en el texto.
     Args:
         message (str): El texto a procesar.
     Returns:
         int: El número de teléfonos detectados.
     """
-    text = normalize_text(message)
-    if not text:
-        return 0
-
-    return sum(1 for _ in PHONE_REGEX.finditer(text))
+    return _count_group(message, "phone")
 
 
 def mask_urls_in_message(message: str) -> str:
@@ -117,22 +209,18 @@ def mask_urls_in_message(message: str) -> str:
     Returns:
         str: El texto con las URLs enmascaradas.
     """
-    text = normalize_text(message)
-    return URL_REGEX.sub("[URL]", text)
+    return _mask_group(message, "url")
 
 
 def url_count(message: str) -> int:
     """
-    Cuenta cuántas URLs detecta en el texto usando URL_REGEX.
+    Cuenta cuántas URLs detecta en el texto.
     Args:
         message (str): El texto a procesar.
     Returns:
         int: El número de URLs detectadas.
     """
-    text = normalize_text(message)
-    if not text:
-        return 0
-    return sum(1 for _ in URL_REGEX.finditer(text))
+    return _count_group(message, "url")
 
 
 def anonymize_origin_url(url: str) -> str:
@@ -173,20 +261,15 @@ def mask_emails_in_message(message: str) -> str:
     Returns:
         str: El texto con los emails enmascarados.
     """
-    text = normalize_text(message)
-    return EMAIL_REGEX.sub("[EMAIL]", text)
+    return _mask_group(message, "email")
 
 
 def email_count(message: str) -> int:
     """
-    Cuenta cuántos emails detecta en el texto usando EMAIL_REGEX.
+    Cuenta cuántos emails detecta en el texto.
     Args:
         message (str): El texto a procesar.
     Returns:
         int: El número de emails detectados.
     """
-    text = normalize_text(message)
-    if not text:
-        return 0
-
-    return sum(1 for _ in EMAIL_REGEX.finditer(text))
+    return _count_group(message, "email")
@@ -0,0 +1,93 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import process_data
+from process_data import COLUMN_DTYPES, OUTPUT_COLS, clean_chunk
+
+HEADER = list(COLUMN_DTYPES)
+ROWS = [
+    # Primer bloque sin fecha ni textos: el esquema no debe depender de ello
+    [None, None, None, 1, None, None, None, None, None],
+    [None, None, None, 2, None, None, None, None, None],
+    [
+        "Ana",
+        "ana@gmail.com",
+        "Llama al 600123456 o escribe a ana@gmail.com",
+        3,
+        "2024-01-02 10:00:00",
+        "https://web.es/contacto?utm_source=x",
+        "Mozilla/5.0",
+        "1.2.3.4",
+        '{"1":[82126]}',
+    ],
+    [
+        "Luis",
+        "luis@x.es",
+        "Oferta SEO en www.spam.io",
+        4,
+        "2024-01-03 11:00:00",
+        "https://web.es/",
+        "Chrome",
+        "5.6.7.8",
+        "1200",
+    ],
+]
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame(ROWS, columns=HEADER).astype(COLUMN_DTYPES)
+
+
+def test_clean_chunk_in_process():
+    df = clean_chunk(_frame())
+
+    assert list(df.columns) == OUTPUT_COLS
+    assert len(df) == len(ROWS)
+    assert str(df["entry_id"].dtype) == "Int64"
+    for col in ["email_count_msg", "phone_count_msg", "url_count_msg"]:
+        assert pd.api.types.is_integer_dtype(df[col])
+    for col in ["entry_date", "user_agent", "submission_speed_ms"]:
+        assert str(df[col].dtype) == "string"
+
+    assert df["message_clean"].tolist() == [
+        "",
+        "",
+        "Llama al [PHONE] o escribe a [EMAIL]",
+        "Oferta SEO en [URL]",
+    ]
+    assert df["email_domain"].tolist() == ["", "", "gmail.com", "x.es"]
+    assert df["name_anon"].iloc[0] == ""
+    assert df["name_anon"].iloc[2].startswith("NAME_")
+    counts = df[["email_count_msg", "phone_count_msg", "url_count_msg"]]
+    assert counts.values.tolist() == [
+        [0, 0, 0],
+        [0, 0, 0],
+        [1, 1, 0],
+        [0, 0, 1],
+    ]
+    assert df["submission_speed_ms"].iloc[2] == '{"1":[82126]}'
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_main_writes_every_chunk(tmp_path, monkeypatch, max_workers):
+    input_path = tmp_path / "data.csv"
+    parquet_path = tmp_path / "data_clean.parquet"
+    csv_path = tmp_path / "data_clean.csv"
+    pd.DataFrame(ROWS, columns=HEADER).to_csv(input_path, index=False)
+
+    monkeypatch.setattr(process_data, "INPUT_PATH", str(input_path))
+    monkeypatch.setattr(process_data, "OUTPUT_PATH_INTERIM", str(parquet_path))
+    monkeypatch.setattr(process_data, "OUTPUT_PATH_FINAL", str(csv_path))
+    monkeypatch.setattr(process_data, "CHUNK_SIZE", 2)
+    monkeypatch.setattr(process_data, "MAX_WORKERS", max_workers)
+    process_data.main()
+
+    table = pq.read_table(parquet_path)
+    assert table.num_rows == len(ROWS)
+    assert table.column_names == OUTPUT_COLS
+    assert table.column("entry_date").to_pylist()[2] == "2024-01-02 10:00:00"
+
+    out = pd.read_csv(csv_path)
+    assert list(out.columns) == OUTPUT_COLS + ["label"]
+    assert out["entry_id"].tolist() == [1, 2, 3, 4]
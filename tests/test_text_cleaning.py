@@ -1,15 +1,21 @@
+import time
+
 import pytest
 
-from process_data import (
+from utils.text_cleaning import (
     anonymize_name,
     anonymize_origin_url,
+    count_all,
     email_count,
     email_to_domain,
+    mask_and_count,
     mask_emails_in_message,
+    mask_message,
     mask_phones_in_message,
     mask_urls_in_message,
     normalize_text,
     phone_count,
+    url_count,
 )
 
 
@@ -34,18 +40,45 @@ def test_anonymize_name_empty_is_empty():
     assert anonymize_name(None) == ""
 
 
+def test_anonymize_name_is_stable_and_normalized():
+    assert anonymize_name("Ana  López") == anonymize_name(" ana lópez ")
+    assert anonymize_name("Ana").startswith("NAME_")
+    assert anonymize_name("Ana") != anonymize_name("Ana", salt="otro")
+
+
 @pytest.mark.parametrize(
     "text,expected",
     [
         ("Mira https://www.dominiodeejemplo.es/contacto/ y dime", "Mira [URL] y dime"),
         ("Visita www.google.com ahora", "Visita [URL] ahora"),
+        ("Visita WWW.GOOGLE.COM ahora", "Visita [URL] ahora"),
+        ("Mira HTTP://localhost:8000", "Mira [URL]"),
         ("Te dejo dominiodeejemplo.es/contacto para verlo", "Te dejo [URL] para verlo"),
+        ("Entra en bit.ly/x ya", "Entra en [URL] ya"),
+        ("Únete a t.me/spamgroup", "Únete a [URL]"),
+        ("Oferta en shop.de/offer", "Oferta en [URL]"),
+        ("Visita x.ru o casino-online.ru", "Visita [URL] o [URL]"),
     ],
 )
 def test_mask_urls_in_message_masks_urls(text, expected):
     assert mask_urls_in_message(text) == expected
 
 
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Tiene 260.000km",
+        "Lo quiero p.ej. mañana",
+        "Versión 3.0.1 instalada",
+        "Nota 4.5/5 a 120km/h",
+        "Hola.Me interesa",
+    ],
+)
+def test_mask_urls_in_message_ignores_non_urls(text):
+    assert mask_urls_in_message(text) == text
+    assert url_count(text) == 0
+
+
 def test_mask_urls_in_message_does_not_touch_emails():
     text = "Mi email es rocio@gmail.com (no debería tocarlo)"
     assert mask_urls_in_message(text) == text
@@ -63,8 +96,70 @@ def test_mask_phones_in_message_and_count():
     assert phone_count(text) == 2
 
 
+def test_mask_message_masks_everything_in_one_pass():
+    text = "Escribe a rocio@gmail.com, mira www.google.com o llama al 911-223-344"
+    assert mask_message(text) == "Escribe a [EMAIL], mira [URL] o llama al [PHONE]"
+
+
+def test_count_all_matches_individual_counts():
+    text = "Escribe a ana@gmail.com o b@x.es, mira www.google.com o llama al 911223344"
+    assert count_all(text) == (2, 1, 1)
+    assert count_all(text) == (email_count(text), url_count(text), phone_count(text))
+    assert count_all("") == (0, 0, 0)
+
+
+def test_mask_and_count_matches_mask_message_and_count_all():
+    text = "Escribe a ana@gmail.com o b@x.es, mira www.google.com o llama al 911223344"
+    clean, *counts = mask_and_count(text)
+    assert clean == mask_message(text)
+    assert tuple(counts) == count_all(text) == (2, 1, 1)
+    assert mask_and_count(None) == ("", 0, 0, 0)
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("Teléfonos 600123456 911223344", "Teléfonos [PHONE] [PHONE]"),
+        ("600-123-456 611-222-333", "[PHONE] [PHONE]"),
+        ("Tel 600\u00a0123\u00a0456", "Tel [PHONE]"),
+        ("Tel \uff16\uff10\uff10\uff11\uff12\uff13\uff14\uff15\uff16", "Tel [PHONE]"),
+    ],
+)
+def test_mask_phones_in_message_adjacent_and_unicode_separators(text, expected):
+    assert mask_phones_in_message(text) == expected
+    assert phone_count(text) == expected.count("[PHONE]")
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["Pedido 1234567", "Referencia 12345678901234567890", "Precio 3.000 euros"],
+)
+def test_phone_count_ignores_short_and_long_numbers(text):
+    assert phone_count(text) == 0
+    assert mask_phones_in_message(text) == text
+
+
+def test_phone_does_not_swallow_following_email():
+    text = "600 123 456 123juan@gmail.com"
+    assert mask_message(text) == "[PHONE] [EMAIL]"
+    assert count_all(text) == (1, 0, 1)
+    assert mask_message("Tel +600123456juan@gmail.com") == "Tel +[EMAIL]"
+
+
+@pytest.mark.parametrize("unit", ["1-", "1 ", "12-", "1"])
+def test_mask_and_count_is_fast_on_long_digit_runs(unit):
+    # Un lookahead hasta la @ hacía que "1-1-1-...@" tardase decenas de segundos
+    text = unit * 2000 + "@gmail.com"
+    start = time.perf_counter()
+    mask_and_count(text)
+    assert time.perf_counter() - start < 0.5
+
+
 def test_email_to_domain():
     assert email_to_domain("rocio@gmail.com") == "gmail.com"
+    assert email_to_domain("<rocio@ gmail.com>;") == "gmail.com"
+    assert email_to_domain("a@\xa0gmail.com") == "gmail.com"
+    assert email_to_domain("a@\u2003gmail.com>") == "gmail.com"
     assert email_to_domain("") == ""
     assert email_to_domain("no-es-email") == ""
 
@@ -0,0 +1,67 @@
+"""
+Perfila las ramas de URL_BRANCHES sobre un CSV exportado de Gravity Forms.
+
+Para cada rama se sustituye por un literal que no aparece en el texto
+("foobar123") y se vuelve a contar: las coincidencias que se pierden son las
+que aporta esa rama. También se muestran ejemplos de lo que encaja en cada
+una, para detectar ramas inútiles o que capturan de más.
+
+Uso (desde la raíz del repo):
+    PYTHONPATH=src python tools/profile_regex.py --input data/raw/data.csv
+"""
+
+import argparse
+import re
+from collections import Counter
+
+import pandas as pd
+
+from utils.patterns import EMAIL_REGEX, URL_BRANCHES
+
+ABLATION_LITERAL = "foobar123"
+
+
+def compile_url_regex(branches) -> re.Pattern:
+    # Igual que URL_PAT, pero con un grupo con nombre por rama
+    alternatives = "|".join(f"(?P<b{i}>{branch})" for i, branch in enumerate(branches))
+    return re.compile(rf"(?i)\b(?:{alternatives})")
+
+
+def count_matches(regex: re.Pattern, texts) -> int:
+    return sum(len(regex.findall(text)) for text in texts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--input", default="data/raw/data.csv")
+    parser.add_argument("--column", default="Mensaje")
+    parser.add_argument("--examples", type=int, default=5)
+    args = parser.parse_args()
+
+    messages = pd.read_csv(args.input, usecols=[args.column])[args.column]
+    # Los emails se enmascaran antes en el pipeline: no cuentan como URL
+    texts = [EMAIL_REGEX.sub("[EMAIL]", m) for m in messages.dropna().astype(str)]
+
+    full = compile_url_regex(URL_BRANCHES)
+    total = count_matches(full, texts)
+    print(f"Mensajes: {len(texts)}  URLs detectadas: {total}\n")
+
+    examples = {i: Counter() for i in range(len(URL_BRANCHES))}
+    for text in texts:
+        for m in full.finditer(text):
+            examples[int(m.lastgroup[1:])][m.group(0)] += 1
+
+    for i, branch in enumerate(URL_BRANCHES):
+        ablated = list(URL_BRANCHES)
+        ablated[i] = ABLATION_LITERAL
+        removed = total - count_matches(compile_url_regex(ablated), texts)
+        share = removed / total if total else 0.0
+        print(f"[{i}] {branch}")
+        print(f"    coincidencias perdidas sin la rama: {removed} ({share:.1%})")
+        for match, n in examples[i].most_common(args.examples):
+            print(f"    {n:>6}  {match}")
+        print()
+
+
+if __name__ == "__main__":
+    main()